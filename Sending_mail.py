@@ -11,16 +11,31 @@ import os
 import sys
 import time
 import logging
+import logging.handlers
+import atexit
 import argparse
 import re
+import asyncio
+import string
+import functools
+import itertools
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, Iterable, Iterator, List, Dict, Optional, Tuple
 from email.message import EmailMessage
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
+from email.generator import BytesGenerator
+from io import BytesIO
 import smtplib
+import socket
+import ssl
 from tqdm import tqdm
 
 try:
@@ -29,6 +44,103 @@ try:
 except ImportError:
     print("Warning: python-dotenv not installed. Using environment variables only.")
 
+try:
+    import aiosmtplib
+except ImportError:
+    aiosmtplib = None  # Optional: only needed for AsyncEmailSender
+
+# Compiled once; \Z (unlike $) does not accept a trailing newline
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\Z')
+
+# Read size for CSV files; large buffers cut read() calls on multi-GB lists
+CSV_BUFFER_SIZE = 1 << 20
+
+# Domains whose mailboxes ignore dots and +tags in the local part
+_GMAIL_DOMAINS = {'gmail.com', 'googlemail.com'}
+
+# Port for SMTP over implicit TLS (SMTPS); other ports use STARTTLS
+SMTP_SSL_PORT = 465
+
+# Placeholder written into the To: header of pre-serialized messages
+RECIPIENT_SENTINEL = b'__RCPT__'
+
+# To: header for messages delivered to a batch of recipients in one transaction
+UNDISCLOSED_RECIPIENTS = 'undisclosed-recipients:;'
+
+# Errors that mean the SMTP connection itself is unusable and should be replaced
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionResetError)
+
+# Per-recipient failures, from either SMTP backend (aiosmtplib errors do not subclass smtplib's)
+RECIPIENT_ERRORS = (smtplib.SMTPRecipientsRefused,) + (
+    (aiosmtplib.SMTPRecipientsRefused,) if aiosmtplib is not None else ())
+DATA_ERRORS = (smtplib.SMTPDataError,) + (
+    (aiosmtplib.SMTPDataError,) if aiosmtplib is not None else ())
+
+
+class NameTemplate(string.Template):
+    """string.Template matching only `{name}`-style placeholders, so other braces (e.g. CSS) are left alone."""
+
+    pattern = r'''
+    \{(?P<named>[_a-z][_a-z0-9]*)\}
+    | (?P<escaped>(?!))
+    | (?P<braced>(?!))
+    | (?P<invalid>(?!))
+    '''
+
+    def has_placeholder(self, identifier: str = 'name') -> bool:
+        """Return True if the template contains `{identifier}`."""
+        return any(m.group('named') == identifier for m in self.pattern.finditer(self.template))
+
+
+@dataclass
+class Recipient:
+    """A validated recipient; `display` is the name used for `{name}` personalization."""
+
+    __slots__ = ('email', 'name', 'display')
+
+    email: str
+    name: str
+    display: str
+
+    @classmethod
+    def create(cls, email: str, name: str = "") -> 'Recipient':
+        """Build a recipient, falling back to the address' local part for the display name."""
+        return cls(email, name, name or email.split('@', 1)[0])
+
+
+def is_header_row(row: List[str]) -> bool:
+    """A first CSV row without any address is a header."""
+    return not any('@' in cell for cell in row)
+
+
+def dedup_key(email: str) -> str:
+    """Key identifying the mailbox an address delivers to, used to drop duplicate rows."""
+    local, _, domain = email.lower().rpartition('@')
+    if domain in _GMAIL_DOMAINS:
+        local = local.split('+', 1)[0].replace('.', '')
+        domain = 'gmail.com'
+    return f"{local}@{domain}"
+
+
+def count_lines(path: str) -> int:
+    """Count lines in a file by scanning 1 MiB binary blocks for newlines."""
+    lines = 0
+    last_block = b''
+    with open(os.fspath(path), 'rb', buffering=0) as f:
+        for block in iter(lambda: f.read(CSV_BUFFER_SIZE), b''):
+            lines += block.count(b'\n')
+            last_block = block
+    if last_block and not last_block.endswith(b'\n'):
+        lines += 1
+    return lines
+
+
+def count_csv_rows(csv_file: str) -> int:
+    """Upper bound on the number of recipients in a CSV file (data lines, not parsed rows)."""
+    with open(os.fspath(csv_file), 'r', newline='', encoding='utf-8') as f:
+        first = next(csv.reader(f), [])
+    return max(0, count_lines(csv_file) - (1 if first and is_header_row(first) else 0))
+
 
 class EmailSenderConfig:
     """Configuration class for email sender."""
@@ -38,8 +150,21 @@ class EmailSenderConfig:
         self.email_password = os.getenv('EMAIL_PASSWORD', '')
         self.smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
         self.smtp_port = int(os.getenv('SMTP_PORT', '587'))
+        # Seconds before a stalled SMTP connect or command is abandoned
+        self.smtp_timeout = float(os.getenv('SMTP_TIMEOUT', '30'))
         self.default_subject = os.getenv('DEFAULT_SUBJECT', 'Explore Vietnam')
         self.rate_limit_delay = float(os.getenv('RATE_LIMIT_DELAY', '1.0'))
+        # Token bucket pacing: mean rate in messages/second and burst capacity.
+        # RATE_LIMIT_RPS defaults to the rate implied by RATE_LIMIT_DELAY.
+        default_rps = 1.0 / self.rate_limit_delay if self.rate_limit_delay > 0 else 0.0
+        self.rate_limit_rps = float(os.getenv('RATE_LIMIT_RPS', str(default_rps)))
+        self.rate_limit_burst = int(os.getenv('RATE_LIMIT_BURST', '1'))
+        # Recycle the SMTP connection after this many messages (provider per-connection caps)
+        self.max_msgs_per_conn = int(os.getenv('MAX_MSGS_PER_CONN', '1000'))
+        # Number of concurrent SMTP connections used for bulk sending
+        self.smtp_pool_size = int(os.getenv('SMTP_POOL_SIZE', '5'))
+        # Recipients per SMTP transaction when the message is not personalized (1 disables batching)
+        self.batch_rcpts = int(os.getenv('BATCH_RCPTS', '50'))
 
     def validate(self) -> bool:
         """Validate configuration."""
@@ -52,8 +177,202 @@ class EmailSenderConfig:
     @staticmethod
     def _is_valid_email(email: str) -> bool:
         """Validate email format."""
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return re.match(pattern, email) is not None
+        return _EMAIL_RE.match(email) is not None
+
+
+class TokenBucket:
+    """Token bucket rate limiter: allows bursts of `capacity` messages at a mean `rate` per second."""
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens: float = float(self.capacity)
+        self.last: float = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, count: int = 1) -> float:
+        """Take `count` tokens and return the wait; the bucket may go negative so waiters queue up."""
+        if self.rate <= 0:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            self.tokens -= count
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def acquire(self, count: int = 1):
+        """Take `count` tokens, blocking only when the bucket runs short."""
+        delay = self.reserve(count)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, count: int = 1):
+        """Take `count` tokens without blocking the event loop."""
+        delay = self.reserve(count)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class PinnedSMTP(smtplib.SMTP):
+    """SMTP client that may connect to a resolved address but verifies STARTTLS against `server_name`."""
+
+    def __init__(self, server_name: str, context: ssl.SSLContext, **kwargs):
+        self.server_name = server_name
+        self.context = context
+        super().__init__(**kwargs)
+
+    def starttls(self, context: Optional[ssl.SSLContext] = None):
+        """Upgrade to TLS like `smtplib.SMTP.starttls`, checking the certificate for `server_name`."""
+        self.ehlo_or_helo_if_needed()
+        if not self.has_extn('starttls'):
+            raise smtplib.SMTPNotSupportedError("STARTTLS extension not supported by server.")
+        resp, reply = self.docmd('STARTTLS')
+        if resp != 220:
+            raise smtplib.SMTPResponseException(resp, reply)
+        self.sock = (context or self.context).wrap_socket(self.sock, server_hostname=self.server_name)
+        # Forget what the server said before TLS (RFC 3207), as smtplib does
+        self.file = None
+        self.helo_resp = None
+        self.ehlo_resp = None
+        self.esmtp_features = {}
+        self.does_esmtp = False
+        return resp, reply
+
+
+class PinnedSMTP_SSL(smtplib.SMTP_SSL):
+    """SMTP_SSL client that may connect to a resolved address but verifies TLS against `server_name`."""
+
+    def __init__(self, server_name: str, context: ssl.SSLContext, **kwargs):
+        self.server_name = server_name
+        super().__init__(context=context, **kwargs)
+
+    def _get_socket(self, host, port, timeout):
+        sock = smtplib.SMTP._get_socket(self, host, port, timeout)
+        return self.context.wrap_socket(sock, server_hostname=self.server_name)
+
+
+class SMTPConnectionPool:
+    """Pool of authenticated SMTP connections shared by sender threads, grown lazily up to `size`."""
+
+    def __init__(self, factory: Callable[[], smtplib.SMTP], size: int = 1,
+                 max_msgs_per_conn: int = 1000):
+        self.factory = factory
+        self.size = max(1, size)
+        self.max_msgs_per_conn = max_msgs_per_conn
+        self._idle: queue.Queue = queue.Queue()
+        self._sent: Dict[int, int] = {}
+        self._created = 0
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger('EmailSender')
+
+        # Open the first connection eagerly so bad credentials fail fast
+        self._idle.put(self._checkout())
+
+    @staticmethod
+    def _quit(conn: smtplib.SMTP):
+        try:
+            conn.quit()
+        except Exception:
+            pass
+
+    def _close(self, conn: smtplib.SMTP):
+        with self._lock:
+            self._created -= 1
+            self._sent.pop(id(conn), None)
+        self._quit(conn)
+
+    def _replace(self, conn: smtplib.SMTP) -> smtplib.SMTP:
+        new_conn = self.factory()
+        # Swap in one step; _created never dips, so other threads cannot grow past `size`
+        with self._lock:
+            self._sent.pop(id(conn), None)
+            self._sent[id(new_conn)] = 0
+        self._quit(conn)
+        return new_conn
+
+    def _checkout(self) -> smtplib.SMTP:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_grow = self._created < self.size
+            if can_grow:
+                self._created += 1
+        if not can_grow:
+            return self._idle.get()
+
+        try:
+            conn = self.factory()
+        except Exception as e:
+            with self._lock:
+                self._created -= 1
+                remaining = self._created
+                if remaining:
+                    self.size = remaining
+            if not remaining:
+                raise
+            self.logger.warning(f"Could not open another SMTP connection ({e}), "
+                                f"continuing with {self.size}")
+            return self._idle.get()
+        with self._lock:
+            self._sent[id(conn)] = 0
+        return conn
+
+    @contextmanager
+    def acquire(self) -> Iterator[smtplib.SMTP]:
+        """Check out a connection for exclusive use and return it to the pool afterwards."""
+        conn = self._checkout()
+        try:
+            if self._sent.get(id(conn), 0) >= self.max_msgs_per_conn:
+                conn = self._replace(conn)
+            yield conn
+            self._sent[id(conn)] += 1
+        except CONNECTION_ERRORS:
+            conn = self._replace(conn)
+            raise
+        finally:
+            self._idle.put(conn)
+
+    def _run(self, send: Callable[[smtplib.SMTP], object]):
+        """Run `send` on any free connection, resending once on its replacement if it dropped."""
+        conn = self._checkout()
+        try:
+            if self._sent.get(id(conn), 0) >= self.max_msgs_per_conn:
+                conn = self._replace(conn)
+            try:
+                result = send(conn)
+            except CONNECTION_ERRORS:
+                # Other idle connections may be just as stale, so retry on the fresh one
+                conn = self._replace(conn)
+                result = send(conn)
+            self._sent[id(conn)] += 1
+            return result
+        except CONNECTION_ERRORS:
+            conn = self._replace(conn)
+            raise
+        finally:
+            self._idle.put(conn)
+
+    def send_message(self, message: EmailMessage):
+        """Send a message object on a pooled connection."""
+        return self._run(lambda conn: conn.send_message(message))
+
+    def sendmail(self, from_addr: str, to_addrs: List[str], raw_message: bytes):
+        """Send an already serialized message on a pooled connection."""
+        return self._run(lambda conn: conn.sendmail(from_addr, to_addrs, raw_message))
+
+    def close_all(self):
+        """Close every idle connection in the pool."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._close(conn)
 
 
 class EmailSender:
@@ -63,12 +382,20 @@ class EmailSender:
         self.config = config
         self.logger = self._setup_logging()
         self.smtp_connection: Optional[smtplib.SMTP] = None
+        self.bucket = TokenBucket(config.rate_limit_rps, config.rate_limit_burst)
+        self._attachment_cache: Dict[Tuple[str, float], MIMEBase] = {}
+        self._resolved_addrs: List[str] = []
+        # Verifies certificates and hostnames, unlike smtplib's default context
+        self._tls_context = ssl.create_default_context()
 
     def _setup_logging(self) -> logging.Logger:
-        """Setup logging configuration."""
+        """Setup logging configuration, writing records from a background QueueListener."""
         logger = logging.getLogger('EmailSender')
         logger.setLevel(logging.INFO)
 
+        if any(isinstance(h, logging.handlers.QueueHandler) for h in logger.handlers):
+            return logger
+
         # Create logs directory if it doesn't exist
         log_dir = Path('logs')
         log_dir.mkdir(exist_ok=True)
@@ -88,22 +415,68 @@ class EmailSender:
         file_handler.setFormatter(formatter)
         console_handler.setFormatter(formatter)
 
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
+        log_queue: queue.Queue = queue.Queue(-1)
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+
+        listener = logging.handlers.QueueListener(
+            log_queue, file_handler, console_handler, respect_handler_level=True
+        )
+        listener.start()
+        atexit.register(listener.stop)
 
         return logger
 
+    def _resolve_smtp_server(self) -> List[str]:
+        """Resolve the SMTP server once and reuse its addresses for every (re)connect."""
+        if not self._resolved_addrs:
+            try:
+                infos = socket.getaddrinfo(self.config.smtp_server, self.config.smtp_port,
+                                           type=socket.SOCK_STREAM)
+                self._resolved_addrs = list(dict.fromkeys(info[4][0] for info in infos))
+            except OSError as e:
+                self.logger.warning(f"Could not resolve {self.config.smtp_server}: {e}")
+        return self._resolved_addrs
+
+    def _open_smtp_connection(self) -> smtplib.SMTP:
+        """Open and authenticate a new SMTP connection."""
+        self.logger.info(f"Connecting to SMTP server: {self.config.smtp_server}:{self.config.smtp_port}")
+        implicit_tls = self.config.smtp_port == SMTP_SSL_PORT
+        smtp_class = PinnedSMTP_SSL if implicit_tls else PinnedSMTP
+        # Connect to a pinned address; TLS still checks the certificate against the server name
+        connection = smtp_class(self.config.smtp_server, self._tls_context,
+                                timeout=self.config.smtp_timeout)
+        addresses = self._resolve_smtp_server()
+        last_error: Optional[OSError] = None
+        # Try every resolved address, then the hostname itself, before giving up
+        for host in addresses + [self.config.smtp_server]:
+            try:
+                connection.connect(host, self.config.smtp_port)
+                break
+            except OSError as e:
+                self.logger.warning(f"Could not connect to {host}:{self.config.smtp_port}: {e}")
+                connection.close()
+                last_error = e
+        else:
+            self._resolved_addrs = []
+            raise last_error
+        if host in addresses and host != addresses[0]:
+            # Reconnect to the address that answered first next time
+            self._resolved_addrs = [host] + [addr for addr in addresses if addr != host]
+
+        connection.ehlo()
+        # Implicit TLS (port 465) needs no STARTTLS round trips. On other ports,
+        # login() re-sends EHLO after STARTTLS, so no explicit second EHLO is needed.
+        if not implicit_tls:
+            connection.starttls()
+
+        self.logger.info("Authenticating with email credentials...")
+        connection.login(self.config.email_address, self.config.email_password)
+        return connection
+
     def connect_smtp(self) -> bool:
         """Establish SMTP connection with error handling."""
         try:
-            self.logger.info(f"Connecting to SMTP server: {self.config.smtp_server}:{self.config.smtp_port}")
-            self.smtp_connection = smtplib.SMTP(self.config.smtp_server, self.config.smtp_port)
-            self.smtp_connection.ehlo()
-            self.smtp_connection.starttls()
-            self.smtp_connection.ehlo()
-
-            self.logger.info("Authenticating with email credentials...")
-            self.smtp_connection.login(self.config.email_address, self.config.email_password)
+            self.smtp_connection = self._open_smtp_connection()
             self.logger.info("Successfully connected and authenticated!")
             return True
 
@@ -128,170 +501,455 @@ class EmailSender:
             finally:
                 self.smtp_connection = None
 
-    def load_email_list(self, csv_file: str) -> List[Dict[str, str]]:
-        """Load and validate email list from CSV file."""
-        email_list = []
-
-        if not Path(csv_file).exists():
+    def iter_email_list(self, csv_file: str) -> Iterator[Recipient]:
+        """Stream validated recipients from a CSV file one row at a time."""
+        if not Path(csv_file).is_file():
             self.logger.error(f"CSV file not found: {csv_file}")
-            return email_list
+            return
 
+        loaded = 0
+        duplicates = 0
+        seen = set()
         try:
-            with open(csv_file, 'r', newline='', encoding='utf-8') as csv_file_handle:
-                # Try to detect if file has headers
-                sample = csv_file_handle.read(1024)
-                csv_file_handle.seek(0)
-
-                # Check if first line looks like headers
-                first_line = csv_file_handle.readline().strip()
-                csv_file_handle.seek(0)
-
-                has_header = 'email' in first_line.lower() or '@' not in first_line
-
-                reader = csv.DictReader(csv_file_handle) if has_header else csv.reader(csv_file_handle)
-
-                for row_num, row in enumerate(reader, 1):
-                    try:
-                        if isinstance(row, dict):
-                            # DictReader case
-                            email = row.get('email', '').strip()
-                            name = row.get('name', '').strip()
-                        else:
-                            # Regular reader case
-                            email = row[0].strip() if row else ''
-                            name = row[1].strip() if len(row) > 1 else ''
-
-                        if email and self.config._is_valid_email(email):
-                            email_list.append({
-                                'email': email,
-                                'name': name or email.split('@')[0]
-                            })
-                        elif email:
-                            self.logger.warning(f"Invalid email format at row {row_num}: {email}")
-
-                    except Exception as e:
-                        self.logger.warning(f"Error processing row {row_num}: {e}")
+            with open(os.fspath(csv_file), 'r', newline='', encoding='utf-8',
+                      buffering=CSV_BUFFER_SIZE) as csv_file_handle:
+                reader = csv.reader(csv_file_handle)
+                first = next(reader, [])
+
+                has_header = is_header_row(first)
+                if has_header:
+                    header = [heading.strip().lower() for heading in first]
+                    if 'email' in header:
+                        email_col = header.index('email')
+                    else:
+                        email_col = 0
+                        if header:
+                            self.logger.warning("CSV header has no 'email' column, using the first column")
+                    name_col = header.index('name') if 'name' in header else None
+                    rows = reader
+                else:
+                    email_col, name_col = 0, 1
+                    rows = itertools.chain([first], reader)
+
+                for row in rows:
+                    if len(row) <= email_col:
+                        continue
+
+                    email = row[email_col].strip()
+                    name = row[name_col].strip() if name_col is not None and len(row) > name_col else ''
+
+                    if email and self.config._is_valid_email(email):
+                        key = dedup_key(email)
+                        if key in seen:
+                            duplicates += 1
+                            continue
+                        seen.add(key)
+                        loaded += 1
+                        yield Recipient.create(email, name)
+                    elif email:
+                        self.logger.warning(f"Invalid email format at row {reader.line_num}: {email}")
 
         except Exception as e:
             self.logger.error(f"Error reading CSV file: {e}")
 
-        self.logger.info(f"Loaded {len(email_list)} valid email addresses")
-        return email_list
+        if duplicates:
+            self.logger.info(f"Deduplicated {duplicates} addresses")
+        self.logger.info(f"Loaded {loaded} valid email addresses")
+
+    def load_email_list(self, csv_file: str) -> List[Recipient]:
+        """Load and validate email list from CSV file."""
+        return list(self.iter_email_list(csv_file))
+
+    def _build_attachment_parts(self, attachments: Optional[List[str]]) -> List[MIMEBase]:
+        """Read and base64-encode attachment files into MIME parts, cached by (path, mtime)."""
+        parts = []
+        for file_path in attachments or []:
+            path = Path(file_path)
+            if not path.is_file():
+                self.logger.warning(f"Attachment not found: {file_path}")
+                continue
+
+            key = (str(path.resolve()), path.stat().st_mtime)
+            part = self._attachment_cache.get(key)
+            if part is None:
+                with open(path, 'rb') as attachment:
+                    part = MIMEBase('application', 'octet-stream')
+                    part.set_payload(attachment.read())
+                encoders.encode_base64(part)
+                part.add_header(
+                    'Content-Disposition',
+                    f'attachment; filename= {path.name}'
+                )
+                self._attachment_cache[key] = part
+            parts.append(part)
+        return parts
+
+    def _compile_message_builder(self, subject_tmpl: NameTemplate, body_tmpl: NameTemplate,
+                                 html_tmpl: Optional[NameTemplate] = None,
+                                 attachment_parts: Optional[List[MIMEBase]] = None
+                                 ) -> Callable[[Recipient], EmailMessage]:
+        """Return a function that builds the message for one recipient, specialized once per batch."""
+        from_address = self.config.email_address
+        attachment_parts = list(attachment_parts or [])
+
+        if not html_tmpl and not attachment_parts:
+            def build_plain(recipient: Recipient) -> EmailMessage:
+                message = EmailMessage()
+                message['Subject'] = subject_tmpl.safe_substitute(name=recipient.display)
+                message['From'] = from_address
+                message['To'] = recipient.email
+                message.set_content(body_tmpl.safe_substitute(name=recipient.display))
+                return message
+
+            return build_plain
+
+        def build_multipart(recipient: Recipient) -> EmailMessage:
+            display = recipient.display
+            message = MIMEMultipart('alternative')
+            message['Subject'] = subject_tmpl.safe_substitute(name=display)
+            message['From'] = from_address
+            message['To'] = recipient.email
+            message.attach(MIMEText(body_tmpl.safe_substitute(name=display), 'plain', 'utf-8'))
+            if html_tmpl:
+                message.attach(MIMEText(html_tmpl.safe_substitute(name=display), 'html', 'utf-8'))
+            # Attachment parts are shared between messages; their payload is already encoded
+            for part in attachment_parts:
+                message.attach(part)
+            return message
+
+        return build_multipart
+
+    def create_message_from_templates(self, subject_tmpl: NameTemplate, body_tmpl: NameTemplate,
+                                      html_tmpl: Optional[NameTemplate], recipient: Recipient,
+                                      attachment_parts: Optional[List[MIMEBase]] = None) -> EmailMessage:
+        """Create a personalized message from templates compiled once per batch."""
+        build_message = self._compile_message_builder(subject_tmpl, body_tmpl, html_tmpl, attachment_parts)
+        return build_message(recipient)
 
     def create_message(self, subject: str, body: str, recipient_email: str,
                       recipient_name: str = "", html_body: str = "",
-                      attachments: List[str] = None) -> EmailMessage:
-        """Create email message with optional HTML and attachments."""
+                      attachment_parts: List[MIMEBase] = None) -> EmailMessage:
+        """Create email message with optional HTML and prebuilt attachment parts."""
+        return self.create_message_from_templates(
+            NameTemplate(subject),
+            NameTemplate(body),
+            NameTemplate(html_body) if html_body else None,
+            Recipient.create(recipient_email, recipient_name),
+            attachment_parts
+        )
 
-        if html_body or attachments:
-            message = MIMEMultipart('alternative')
-        else:
-            message = EmailMessage()
-
-        # Personalize the message
-        personalized_body = body.replace('{name}', recipient_name or recipient_email.split('@')[0])
-        personalized_subject = subject.replace('{name}', recipient_name or recipient_email.split('@')[0])
-
-        message['Subject'] = personalized_subject
-        message['From'] = self.config.email_address
-        message['To'] = recipient_email
-
-        if isinstance(message, MIMEMultipart):
-            # Add text part
-            text_part = MIMEText(personalized_body, 'plain', 'utf-8')
-            message.attach(text_part)
-
-            # Add HTML part if provided
-            if html_body:
-                personalized_html = html_body.replace('{name}', recipient_name or recipient_email.split('@')[0])
-                html_part = MIMEText(personalized_html, 'html', 'utf-8')
-                message.attach(html_part)
-
-            # Add attachments if provided
-            if attachments:
-                for file_path in attachments:
-                    if Path(file_path).exists():
-                        with open(file_path, 'rb') as attachment:
-                            part = MIMEBase('application', 'octet-stream')
-                            part.set_payload(attachment.read())
-                            encoders.encode_base64(part)
-                            part.add_header(
-                                'Content-Disposition',
-                                f'attachment; filename= {Path(file_path).name}'
-                            )
-                            message.attach(part)
-                    else:
-                        self.logger.warning(f"Attachment not found: {file_path}")
-        else:
-            message.set_content(personalized_body)
+    def _send_one(self, pool: SMTPConnectionPool, recipient: Recipient,
+                  build_message: Callable[[Recipient], EmailMessage]):
+        """Build and send a single message on a pooled connection (runs in a worker thread)."""
+        message = build_message(recipient)
+
+        # Rate limiting (shared across all workers)
+        self.bucket.acquire()
+
+        pool.send_message(message)
+
+    def _send_raw(self, pool: SMTPConnectionPool, recipient: Recipient, raw_message: bytes):
+        """Send a pre-serialized message, filling in only the recipient address."""
+        per_raw = raw_message.replace(RECIPIENT_SENTINEL, recipient.email.encode('ascii'), 1)
+        self.bucket.acquire()
+
+        pool.sendmail(self.config.email_address, [recipient.email], per_raw)
+
+    def _send_batch(self, pool: SMTPConnectionPool, recipients: List[Recipient],
+                    raw_message: bytes) -> Dict[str, Tuple[int, bytes]]:
+        """Send one message to several recipients in one transaction and return those refused."""
+        # One token per recipient: the rate is in emails/second
+        self.bucket.acquire(len(recipients))
+
+        return pool.sendmail(self.config.email_address, [r.email for r in recipients], raw_message)
+
+    @staticmethod
+    def _serialize_message(message: EmailMessage) -> bytes:
+        """Flatten a message to wire bytes with its own policy, as `smtplib.SMTP.send_message` does."""
+        buffer = BytesIO()
+        BytesGenerator(buffer).flatten(message, linesep='\r\n')
+        return buffer.getvalue()
+
+    @staticmethod
+    def _progress_bar(total: Optional[int]) -> tqdm:
+        """Create a progress bar that redraws at most every 0.5s / 0.5% of the batch."""
+        return tqdm(total=total, desc="Sending emails", mininterval=0.5,
+                    miniters=max(1, (total or 0) // 200), smoothing=0.1)
+
+    @staticmethod
+    def _update_progress(progress_bar: tqdm, results: Dict[str, int], count: int = 1):
+        """Advance the progress bar; the sent/failed postfix is refreshed every 64 recipients."""
+        progress_bar.update(count)
+        done = results['sent'] + results['failed']
+        if done // 64 != (done - count) // 64:
+            progress_bar.set_postfix_str(f"Sent={results['sent']}, Failed={results['failed']}",
+                                         refresh=False)
 
-        return message
+    @staticmethod
+    def _finish_progress(progress_bar: tqdm, results: Dict[str, int]):
+        """Show the final sent/failed counts once sending is done."""
+        # The total may be an upper bound (skipped or duplicate rows); end the bar at 100%
+        progress_bar.total = progress_bar.n
+        progress_bar.set_postfix_str(f"Sent={results['sent']}, Failed={results['failed']}",
+                                     refresh=False)
+        progress_bar.refresh()
+
+    def _record_result(self, future, batch: List[Recipient], results: Dict[str, int]):
+        """Update the results tally from a finished send task covering one or more recipients."""
+        error = future.exception()
+        refused = (future.result() or {}) if error is None else {}
+        for recipient in batch:
+            failure = error
+            if failure is None and recipient.email in refused:
+                failure = smtplib.SMTPRecipientsRefused({recipient.email: refused[recipient.email]})
+            self._record_outcome(recipient, failure, results)
+
+    def _record_outcome(self, recipient: Recipient, error: Optional[BaseException],
+                        results: Dict[str, int]):
+        """Update the results tally for one recipient; `error` is None on success."""
+        if error is None:
+            results['sent'] += 1
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"✓ Sent to {recipient.email}")
+            return
+
+        results['failed'] += 1
+        if isinstance(error, RECIPIENT_ERRORS):
+            self.logger.error(f"✗ Recipient refused {recipient.email}: {error}")
+        elif isinstance(error, DATA_ERRORS):
+            self.logger.error(f"✗ Data error for {recipient.email}: {error}")
+        else:
+            self.logger.error(f"✗ Unexpected error for {recipient.email}: {error}")
 
-    def send_bulk_emails(self, email_list: List[Dict[str, str]], subject: str,
+    def send_bulk_emails(self, email_list: Iterable[Recipient], subject: str,
                         body: str, html_body: str = "", attachments: List[str] = None,
-                        dry_run: bool = False) -> Dict[str, int]:
-        """Send bulk emails with progress tracking and error handling."""
+                        dry_run: bool = False, total: Optional[int] = None) -> Dict[str, int]:
+        """Send bulk emails from any iterable of recipients; `total` sizes the progress bar."""
 
         results = {'sent': 0, 'failed': 0, 'skipped': 0}
+        if total is None and hasattr(email_list, '__len__'):
+            total = len(email_list)
 
-        if not email_list:
+        recipients = iter(email_list)
+        first = next(recipients, None)
+        if first is None:
             self.logger.warning("No valid email addresses to send to")
             return results
+        recipients = itertools.chain([first], recipients)
 
         if dry_run:
-            self.logger.info(f"DRY RUN: Would send {len(email_list)} emails")
-            for recipient in email_list:
-                self.logger.info(f"Would send to: {recipient['email']} ({recipient['name']})")
+            count = 0
+            for recipient in recipients:
+                count += 1
+                self.logger.info(f"Would send to: {recipient.email} ({recipient.display})")
+            self.logger.info(f"DRY RUN: Would send {count} emails")
             return results
 
-        if not self.connect_smtp():
-            self.logger.error("Failed to connect to SMTP server")
+        # Compile templates and encode attachments once for the whole batch
+        subject_tmpl = NameTemplate(subject)
+        body_tmpl = NameTemplate(body)
+        html_tmpl = NameTemplate(html_body) if html_body else None
+        attachment_parts = self._build_attachment_parts(attachments)
+
+        build_message = self._compile_message_builder(subject_tmpl, body_tmpl, html_tmpl, attachment_parts)
+
+        templates = (subject_tmpl, body_tmpl, html_tmpl)
+        batch_size = 1
+        if any(tmpl is not None and tmpl.has_placeholder('name') for tmpl in templates):
+            send = functools.partial(self._send_one, build_message=build_message)
+        elif self.config.batch_rcpts > 1:
+            # No personalization: one DATA payload for many RCPT TO addresses
+            batch_size = self.config.batch_rcpts
+            message = build_message(Recipient.create(UNDISCLOSED_RECIPIENTS))
+            send = functools.partial(self._send_batch, raw_message=self._serialize_message(message))
+        else:
+            # No personalization: serialize the message once and only swap the To: address
+            message = build_message(Recipient.create(RECIPIENT_SENTINEL.decode('ascii')))
+            send = functools.partial(self._send_raw, raw_message=self._serialize_message(message))
+
+        # Connect only after the per-batch setup; DNS is resolved afresh and pinned for the batch
+        self._resolved_addrs = []
+        try:
+            pool = SMTPConnectionPool(
+                self._open_smtp_connection,
+                size=self.config.smtp_pool_size,
+                max_msgs_per_conn=self.config.max_msgs_per_conn
+            )
+        except Exception as e:
+            self.logger.error(f"Failed to connect to SMTP server: {e}")
             return results
 
+        if batch_size > 1:
+            batches = iter(lambda: list(itertools.islice(recipients, batch_size)), [])
+            tasks = ((functools.partial(send, pool, recipients=batch), batch) for batch in batches)
+        else:
+            tasks = ((functools.partial(send, pool, recipient=recipient), [recipient])
+                     for recipient in recipients)
+
+        # Bound the number of queued tasks so the recipient stream is read lazily
+        max_in_flight = pool.size * 4
+
         try:
-            self.logger.info(f"Starting to send {len(email_list)} emails...")
+            self.logger.info(f"Starting to send emails using up to {pool.size} connection(s)...")
 
-            with tqdm(total=len(email_list), desc="Sending emails") as progress_bar:
-                for recipient in email_list:
-                    try:
-                        message = self.create_message(
-                            subject=subject,
-                            body=body,
-                            recipient_email=recipient['email'],
-                            recipient_name=recipient['name'],
-                            html_body=html_body,
-                            attachments=attachments
-                        )
-
-                        self.smtp_connection.send_message(message)
-                        results['sent'] += 1
-                        self.logger.info(f"✓ Sent to {recipient['email']}")
-
-                        # Rate limiting
-                        time.sleep(self.config.rate_limit_delay)
-
-                    except smtplib.SMTPRecipientsRefused as e:
-                        results['failed'] += 1
-                        self.logger.error(f"✗ Recipient refused {recipient['email']}: {e}")
-                    except smtplib.SMTPDataError as e:
-                        results['failed'] += 1
-                        self.logger.error(f"✗ Data error for {recipient['email']}: {e}")
-                    except Exception as e:
-                        results['failed'] += 1
-                        self.logger.error(f"✗ Unexpected error for {recipient['email']}: {e}")
-
-                    progress_bar.update(1)
-                    progress_bar.set_postfix({
-                        'Sent': results['sent'],
-                        'Failed': results['failed']
-                    })
+            with ThreadPoolExecutor(max_workers=pool.size) as executor, \
+                    self._progress_bar(total) as progress_bar:
+                pending = {}
+
+                def drain(futures):
+                    for future in futures:
+                        batch = pending.pop(future)
+                        self._record_result(future, batch, results)
+                        self._update_progress(progress_bar, results, len(batch))
+
+                for task, batch in tasks:
+                    future = executor.submit(task)
+                    pending[future] = batch
+                    if len(pending) >= max_in_flight:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        drain(done)
+
+                drain(as_completed(list(pending)))
+                self._finish_progress(progress_bar, results)
+
+        finally:
+            pool.close_all()
+            self.logger.info("SMTP connections closed")
 
+        self.logger.info(f"Email sending completed. Sent: {results['sent']}, Failed: {results['failed']}")
+        return results
+
+
+class AsyncEmailSender(EmailSender):
+    """Email sender that overlaps SMTP round trips on an asyncio event loop (requires aiosmtplib)."""
+
+    def __init__(self, config: EmailSenderConfig):
+        if aiosmtplib is None:
+            raise ImportError("AsyncEmailSender requires aiosmtplib: pip install aiosmtplib")
+        super().__init__(config)
+
+    async def _open_async_connection(self) -> 'aiosmtplib.SMTP':
+        """Open and authenticate a new asynchronous SMTP session."""
+        self.logger.info(f"Connecting to SMTP server: {self.config.smtp_server}:{self.config.smtp_port}")
+        implicit_tls = self.config.smtp_port == SMTP_SSL_PORT
+        client = aiosmtplib.SMTP(
+            hostname=self.config.smtp_server,
+            port=self.config.smtp_port,
+            use_tls=implicit_tls,
+            start_tls=False,
+            timeout=self.config.smtp_timeout
+        )
+        await client.connect()
+        if not implicit_tls:
+            await client.starttls()
+        await client.login(self.config.email_address, self.config.email_password)
+        return client
+
+    @staticmethod
+    async def _close_async_connection(client: 'aiosmtplib.SMTP'):
+        """Close an asynchronous SMTP session, ignoring errors from dead connections."""
+        try:
+            await client.quit()
+        except Exception:
+            client.close()
+
+    async def _send_worker(self, client: 'aiosmtplib.SMTP', recipients: Iterator[Recipient],
+                           build_message: Callable[[Recipient], EmailMessage],
+                           results: Dict[str, int], progress_bar: tqdm):
+        """Send to recipients from the shared iterator on one SMTP session until it is exhausted."""
+        connection_errors = (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError,
+                             ConnectionResetError)
+        sent_on_conn = 0
+
+        try:
+            for recipient in recipients:
+                error = None
+                try:
+                    message = build_message(recipient)
+
+                    if sent_on_conn >= self.config.max_msgs_per_conn:
+                        await self._close_async_connection(client)
+                        client = await self._open_async_connection()
+                        sent_on_conn = 0
+
+                    await self.bucket.acquire_async()
+
+                    try:
+                        await client.send_message(message)
+                    except connection_errors:
+                        client.close()
+                        client = await self._open_async_connection()
+                        sent_on_conn = 0
+                        await client.send_message(message)
+                    sent_on_conn += 1
+
+                except Exception as e:
+                    error = e
+
+                self._record_outcome(recipient, error, results)
+                self._update_progress(progress_bar, results)
         finally:
-            self.disconnect_smtp()
+            await self._close_async_connection(client)
+
+    async def send_bulk_emails_async(self, email_list: Iterable[Recipient], subject: str,
+                                     body: str, html_body: str = "",
+                                     attachments: List[str] = None,
+                                     total: Optional[int] = None) -> Dict[str, int]:
+        """Send bulk emails concurrently over `smtp_pool_size` asynchronous SMTP sessions."""
+
+        results = {'sent': 0, 'failed': 0, 'skipped': 0}
+        if total is None and hasattr(email_list, '__len__'):
+            total = len(email_list)
+
+        recipients = iter(email_list)
+        first = next(recipients, None)
+        if first is None:
+            self.logger.warning("No valid email addresses to send to")
+            return results
+        recipients = itertools.chain([first], recipients)
+
+        build_message = self._compile_message_builder(
+            NameTemplate(subject),
+            NameTemplate(body),
+            NameTemplate(html_body) if html_body else None,
+            self._build_attachment_parts(attachments)
+        )
+
+        clients = await asyncio.gather(
+            *(self._open_async_connection() for _ in range(max(1, self.config.smtp_pool_size))),
+            return_exceptions=True
+        )
+        errors = [c for c in clients if isinstance(c, BaseException)]
+        clients = [c for c in clients if not isinstance(c, BaseException)]
+        if not clients:
+            self.logger.error(f"Failed to connect to SMTP server: {errors[0]}")
+            return results
+        for error in errors:
+            self.logger.warning(f"Could not open an SMTP session ({error}), "
+                                f"continuing with {len(clients)}")
+
+        self.logger.info(f"Starting to send emails using {len(clients)} async connection(s)...")
+        with self._progress_bar(total) as progress_bar:
+            await asyncio.gather(*(
+                self._send_worker(client, recipients, build_message, results, progress_bar)
+                for client in clients
+            ))
+            self._finish_progress(progress_bar, results)
+        self.logger.info("SMTP connections closed")
 
         self.logger.info(f"Email sending completed. Sent: {results['sent']}, Failed: {results['failed']}")
         return results
 
+    def send_bulk_emails(self, email_list: Iterable[Recipient], subject: str,
+                        body: str, html_body: str = "", attachments: List[str] = None,
+                        dry_run: bool = False, total: Optional[int] = None) -> Dict[str, int]:
+        """Send bulk emails on a new asyncio event loop."""
+        if dry_run:
+            return super().send_bulk_emails(email_list, subject, body, html_body,
+                                            attachments, dry_run=True, total=total)
+        return asyncio.run(self.send_bulk_emails_async(email_list, subject, body,
+                                                       html_body, attachments, total=total))
+
 
 def load_template(template_file: str) -> Tuple[str, str]:
     """Load email template from file."""
@@ -364,6 +1022,8 @@ def main():
     parser.add_argument('--html-template', help='HTML template file')
     parser.add_argument('--attachments', nargs='*', help='Files to attach')
     parser.add_argument('--dry-run', action='store_true', help='Test run without sending emails')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='Send with the asyncio backend (requires aiosmtplib)')
     parser.add_argument('--create-samples', action='store_true', help='Create sample files')
 
     args = parser.parse_args()
@@ -384,13 +1044,23 @@ def main():
         sys.exit(1)
 
     # Initialize email sender
-    sender = EmailSender(config)
-
-    # Load email list
-    email_list = sender.load_email_list(args.csv)
-    if not email_list:
+    if args.use_async:
+        try:
+            sender = AsyncEmailSender(config)
+        except ImportError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+    else:
+        sender = EmailSender(config)
+
+    # Stream the email list; only the first valid row is read up front
+    email_list = sender.iter_email_list(args.csv)
+    first_recipient = next(email_list, None)
+    if first_recipient is None:
         print(f"❌ No valid email addresses found in {args.csv}")
         sys.exit(1)
+    email_list = itertools.chain([first_recipient], email_list)
+    total = count_csv_rows(args.csv)
 
     # Determine subject and body
     subject = args.subject or config.default_subject
@@ -419,7 +1089,7 @@ from pho and banh mi (Vietnamese sandwiches) to regional specialties.
 
 The country's folk culture, traditional festivals make it truly special."""
 
-    print(f"📧 Preparing to send emails to {len(email_list)} recipients")
+    print(f"📧 Preparing to send emails to up to {total} recipients")
     print(f"📝 Subject: {subject}")
 
     if args.dry_run:
@@ -432,7 +1102,8 @@ The country's folk culture, traditional festivals make it truly special."""
         body=body,
         html_body=html_body,
         attachments=args.attachments or [],
-        dry_run=args.dry_run
+        dry_run=args.dry_run,
+        total=total
     )
 
     print(f"\n✅ Email sending completed!")
@@ -7,11 +7,20 @@ import unittest
 import tempfile
 import os
 from pathlib import Path
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import ANY, AsyncMock, Mock, patch, MagicMock
 import csv
+import logging.handlers
+import smtplib
+import ssl
+import threading
+import time
+from email.mime.multipart import MIMEMultipart
 
 # Import the classes we want to test
-from Sending_mail import EmailSenderConfig, EmailSender, load_template
+import Sending_mail
+from Sending_mail import (EmailSenderConfig, EmailSender, AsyncEmailSender, TokenBucket,
+                          SMTPConnectionPool, NameTemplate, Recipient, count_lines,
+                          count_csv_rows, load_template)
 
 
 class TestEmailSenderConfig(unittest.TestCase):
@@ -20,7 +29,8 @@ class TestEmailSenderConfig(unittest.TestCase):
     def setUp(self):
         """Set up test environment."""
         # Clear environment variables
-        env_vars = ['EMAIL_ADDRESS', 'EMAIL_PASSWORD', 'SMTP_SERVER', 'SMTP_PORT']
+        env_vars = ['EMAIL_ADDRESS', 'EMAIL_PASSWORD', 'SMTP_SERVER', 'SMTP_PORT',
+                    'RATE_LIMIT_RPS', 'RATE_LIMIT_BURST']
         for var in env_vars:
             if var in os.environ:
                 del os.environ[var]
@@ -32,6 +42,8 @@ class TestEmailSenderConfig(unittest.TestCase):
         self.assertEqual(config.smtp_port, 587)
         self.assertEqual(config.default_subject, 'Explore Vietnam')
         self.assertEqual(config.rate_limit_delay, 1.0)
+        self.assertEqual(config.rate_limit_rps, 1.0)
+        self.assertEqual(config.rate_limit_burst, 1)
     
     def test_env_var_override(self):
         """Test environment variable override."""
@@ -52,6 +64,7 @@ class TestEmailSenderConfig(unittest.TestCase):
         self.assertFalse(EmailSenderConfig._is_valid_email('invalid-email'))
         self.assertFalse(EmailSenderConfig._is_valid_email('@domain.com'))
         self.assertFalse(EmailSenderConfig._is_valid_email('user@'))
+        self.assertFalse(EmailSenderConfig._is_valid_email('test@example.com\n'))
     
     def test_config_validation(self):
         """Test configuration validation."""
@@ -79,7 +92,13 @@ class TestEmailSender(unittest.TestCase):
         self.config = EmailSenderConfig()
         self.config.email_address = 'test@example.com'
         self.config.email_password = 'password'
+        self.config.smtp_port = 587
         self.sender = EmailSender(self.config)
+        # Pretend DNS resolution so tests never hit the network
+        self.sender._resolved_addrs = ['192.0.2.10']
+        resolver = patch('socket.getaddrinfo', return_value=[(None, None, None, '', ('192.0.2.10', 587))])
+        resolver.start()
+        self.addCleanup(resolver.stop)
     
     def test_initialization(self):
         """Test EmailSender initialization."""
@@ -87,6 +106,13 @@ class TestEmailSender(unittest.TestCase):
         self.assertIsNotNone(self.sender.logger)
         self.assertIsNone(self.sender.smtp_connection)
     
+    def test_logging_uses_single_queue_handler(self):
+        """Test that senders share one queued handler instead of stacking direct handlers."""
+        EmailSender(self.config)
+        handlers = self.sender.logger.handlers
+        self.assertEqual(len(handlers), 1)
+        self.assertIsInstance(handlers[0], logging.handlers.QueueHandler)
+
     def test_load_email_list_valid_csv(self):
         """Test loading valid CSV file."""
         # Create temporary CSV file
@@ -100,8 +126,8 @@ class TestEmailSender(unittest.TestCase):
         try:
             email_list = self.sender.load_email_list(csv_file)
             self.assertEqual(len(email_list), 2)
-            self.assertEqual(email_list[0]['email'], 'test1@example.com')
-            self.assertEqual(email_list[0]['name'], 'Test User 1')
+            self.assertEqual(email_list[0].email, 'test1@example.com')
+            self.assertEqual(email_list[0].name, 'Test User 1')
         finally:
             os.unlink(csv_file)
     
@@ -116,7 +142,7 @@ class TestEmailSender(unittest.TestCase):
         try:
             email_list = self.sender.load_email_list(csv_file)
             self.assertEqual(len(email_list), 2)
-            self.assertEqual(email_list[0]['email'], 'test1@example.com')
+            self.assertEqual(email_list[0].email, 'test1@example.com')
         finally:
             os.unlink(csv_file)
     
@@ -133,15 +159,107 @@ class TestEmailSender(unittest.TestCase):
         try:
             email_list = self.sender.load_email_list(csv_file)
             self.assertEqual(len(email_list), 1)  # Only valid email
-            self.assertEqual(email_list[0]['email'], 'valid@example.com')
+            self.assertEqual(email_list[0].email, 'valid@example.com')
         finally:
             os.unlink(csv_file)
     
+    def test_iter_email_list_streams_rows(self):
+        """Test that iter_email_list yields recipients lazily."""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
+            writer = csv.writer(f)
+            writer.writerow(['name', 'email'])
+            writer.writerow(['Test User 1', 'test1@example.com'])
+            writer.writerow(['Test User 2', 'test2@example.com'])
+            csv_file = f.name
+
+        try:
+            recipients = self.sender.iter_email_list(csv_file)
+            self.assertNotIsInstance(recipients, list)
+            first = next(recipients)
+            self.assertEqual(first, Recipient('test1@example.com', 'Test User 1', 'Test User 1'))
+            self.assertEqual(len(list(recipients)), 1)
+        finally:
+            os.unlink(csv_file)
+
+    def test_load_email_list_no_headers_email_in_address(self):
+        """Test that an address containing 'email' is not mistaken for a header."""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
+            f.write('email.me@example.com\nother@example.com\n')
+            csv_file = f.name
+
+        try:
+            email_list = self.sender.load_email_list(csv_file)
+            self.assertEqual([r.email for r in email_list],
+                             ['email.me@example.com', 'other@example.com'])
+        finally:
+            os.unlink(csv_file)
+
+    def test_load_email_list_header_column_order(self):
+        """Test that header columns are located by name and short or blank rows are skipped."""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
+            f.write('id,Name,Email\n1,Test User 1,test1@example.com\n\n2,Short\n')
+            csv_file = f.name
+
+        try:
+            email_list = self.sender.load_email_list(csv_file)
+            self.assertEqual(len(email_list), 1)
+            self.assertEqual(email_list[0].email, 'test1@example.com')
+            self.assertEqual(email_list[0].name, 'Test User 1')
+        finally:
+            os.unlink(csv_file)
+
+    def test_load_email_list_deduplicates(self):
+        """Test that repeated addresses (case-insensitive, Gmail dots/+tags) are sent once."""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
+            f.write('email,name\n'
+                    'john@example.com,John\n'
+                    'JOHN@example.com,John Again\n'
+                    'jane.doe@gmail.com,Jane\n'
+                    'janedoe+news@googlemail.com,Jane Again\n'
+                    'john+x@example.com,Not A Duplicate\n')
+            csv_file = f.name
+
+        try:
+            email_list = self.sender.load_email_list(csv_file)
+            self.assertEqual([r.email for r in email_list],
+                             ['john@example.com', 'jane.doe@gmail.com', 'john+x@example.com'])
+        finally:
+            os.unlink(csv_file)
+
+    def test_load_email_list_display_name_fallback(self):
+        """Test that recipients without a name use the address' local part for display."""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
+            f.write('email,name\njane.doe@example.com,\n')
+            csv_file = f.name
+
+        try:
+            recipient = self.sender.load_email_list(csv_file)[0]
+            self.assertEqual(recipient.name, '')
+            self.assertEqual(recipient.display, 'jane.doe')
+        finally:
+            os.unlink(csv_file)
+
     def test_load_email_list_nonexistent_file(self):
         """Test loading non-existent CSV file."""
         email_list = self.sender.load_email_list('nonexistent.csv')
         self.assertEqual(len(email_list), 0)
     
+    def test_load_email_list_directory(self):
+        """Test that a directory path is rejected like a missing file."""
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertEqual(self.sender.load_email_list(directory), [])
+
+    def test_load_email_list_path_object(self):
+        """Test loading from a pathlib.Path."""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
+            f.write('email\ntest1@example.com\n')
+            csv_file = Path(f.name)
+
+        try:
+            self.assertEqual(len(self.sender.load_email_list(csv_file)), 1)
+        finally:
+            os.unlink(csv_file)
+
     def test_create_message_basic(self):
         """Test creating basic email message."""
         message = self.sender.create_message(
@@ -167,7 +285,58 @@ class TestEmailSender(unittest.TestCase):
         self.assertEqual(message['Subject'], 'Hello John!')
         # Check body content (implementation depends on message type)
     
-    @patch('smtplib.SMTP')
+    def test_create_message_from_templates(self):
+        """Test building a message from precompiled templates."""
+        message = self.sender.create_message_from_templates(
+            NameTemplate('Hi {name}'),
+            NameTemplate('Dear {name}'),
+            NameTemplate('<style>p{margin:0}</style><p>{name}</p>'),
+            Recipient.create('jane@example.com')
+        )
+
+        self.assertEqual(message['Subject'], 'Hi jane')
+        text_part, html_part = message.get_payload()
+        self.assertEqual(text_part.get_payload(decode=True).decode(), 'Dear jane')
+        self.assertEqual(html_part.get_payload(decode=True).decode(),
+                         '<style>p{margin:0}</style><p>jane</p>')
+
+    def test_compile_message_builder_shapes(self):
+        """Test that the builder is specialized once for the batch's message shape."""
+        build_plain = self.sender._compile_message_builder(NameTemplate('Hi {name}'), NameTemplate('Dear {name}'))
+        plain = build_plain(Recipient.create('ann@example.com', 'Ann'))
+        self.assertNotIsInstance(plain, MIMEMultipart)
+        self.assertEqual(plain['Subject'], 'Hi Ann')
+        self.assertEqual(plain.get_content().strip(), 'Dear Ann')
+
+        build_html = self.sender._compile_message_builder(
+            NameTemplate('Hi {name}'), NameTemplate('Dear {name}'), NameTemplate('<p>{name}</p>')
+        )
+        first = build_html(Recipient.create('ann@example.com', 'Ann'))
+        second = build_html(Recipient.create('bob@example.com'))
+        self.assertIsInstance(first, MIMEMultipart)
+        self.assertEqual(second['To'], 'bob@example.com')
+        self.assertEqual(second.get_payload()[1].get_payload(decode=True).decode(), '<p>bob</p>')
+
+    def test_attachment_parts_are_cached(self):
+        """Test that attachments are read and encoded once and shared between messages."""
+        with tempfile.NamedTemporaryFile(mode='wb', suffix='.pdf', delete=False) as f:
+            f.write(b'%PDF-1.4 test')
+            attachment = f.name
+
+        try:
+            with patch('builtins.open', wraps=open) as mock_open:
+                parts = self.sender._build_attachment_parts([attachment])
+                again = self.sender._build_attachment_parts([attachment])
+            self.assertEqual(mock_open.call_count, 1)
+            self.assertIs(parts[0], again[0])
+
+            first = self.sender.create_message('S', 'B', 'a@example.com', attachment_parts=parts)
+            second = self.sender.create_message('S', 'B', 'b@example.com', attachment_parts=parts)
+            self.assertIs(first.get_payload()[1], second.get_payload()[1])
+        finally:
+            os.unlink(attachment)
+
+    @patch('Sending_mail.PinnedSMTP')
     def test_connect_smtp_success(self, mock_smtp):
         """Test successful SMTP connection."""
         mock_instance = Mock()
@@ -180,7 +349,101 @@ class TestEmailSender(unittest.TestCase):
         mock_instance.starttls.assert_called()
         mock_instance.login.assert_called_with('test@example.com', 'password')
     
-    @patch('smtplib.SMTP')
+    @patch('Sending_mail.PinnedSMTP')
+    @patch('Sending_mail.PinnedSMTP_SSL')
+    def test_connect_smtp_implicit_tls(self, mock_smtp_ssl, mock_smtp):
+        """Test that port 465 uses SMTP_SSL without STARTTLS."""
+        self.config.smtp_port = 465
+
+        result = self.sender.connect_smtp()
+
+        self.assertTrue(result)
+        mock_smtp.assert_not_called()
+        mock_smtp_ssl.assert_called_once_with(self.config.smtp_server, self.sender._tls_context,
+                                              timeout=self.config.smtp_timeout)
+        mock_smtp_ssl.return_value.connect.assert_called_once_with('192.0.2.10', 465)
+        mock_smtp_ssl.return_value.starttls.assert_not_called()
+        mock_smtp_ssl.return_value.login.assert_called_with('test@example.com', 'password')
+
+    @patch('socket.getaddrinfo')
+    @patch('Sending_mail.PinnedSMTP')
+    def test_connect_smtp_pins_resolved_address(self, mock_smtp, mock_getaddrinfo):
+        """Test that DNS is resolved once and TLS still uses the server hostname."""
+        self.sender._resolved_addrs = []
+        mock_getaddrinfo.return_value = [(None, None, None, '', ('203.0.113.5', 587))]
+
+        self.sender.connect_smtp()
+        self.sender.connect_smtp()
+
+        mock_getaddrinfo.assert_called_once()
+        connection = mock_smtp.return_value
+        connection.connect.assert_called_with('203.0.113.5', 587)
+        mock_smtp.assert_called_with(self.config.smtp_server, self.sender._tls_context,
+                                     timeout=self.config.smtp_timeout)
+
+    def test_tls_context_verifies_server_name(self):
+        """Test that TLS checks the certificate and hostname of the configured server."""
+        context = self.sender._tls_context
+        self.assertEqual(context.verify_mode, ssl.CERT_REQUIRED)
+        self.assertTrue(context.check_hostname)
+
+    def test_pinned_starttls_uses_server_name(self):
+        """Test that STARTTLS on a pinned address wraps the socket for the server name."""
+        context = Mock()
+        connection = Sending_mail.PinnedSMTP('smtp.example.com', context)
+        connection.sock = Mock()
+        with patch.object(connection, 'ehlo_or_helo_if_needed'), \
+                patch.object(connection, 'has_extn', return_value=True), \
+                patch.object(connection, 'docmd', return_value=(220, b'Ready')):
+            connection.starttls()
+
+        context.wrap_socket.assert_called_once_with(ANY, server_hostname='smtp.example.com')
+
+    def test_pinned_smtp_ssl_uses_server_name(self):
+        """Test that implicit TLS to a pinned address wraps the socket for the server name."""
+        context = Mock()
+        connection = Sending_mail.PinnedSMTP_SSL('smtp.example.com', context)
+        raw_sock = Mock()
+        with patch.object(smtplib.SMTP, '_get_socket', return_value=raw_sock):
+            connection._get_socket('192.0.2.10', 465, 5)
+
+        context.wrap_socket.assert_called_once_with(raw_sock, server_hostname='smtp.example.com')
+
+    @patch('socket.getaddrinfo')
+    @patch('Sending_mail.PinnedSMTP')
+    def test_send_bulk_emails_resolves_once_per_batch(self, mock_smtp, mock_getaddrinfo):
+        """Test that each batch resolves DNS afresh instead of reusing a stale address."""
+        self.config.batch_rcpts = 1
+        self.sender.bucket = TokenBucket(rate=0)
+        mock_getaddrinfo.return_value = [(None, None, None, '', ('203.0.113.5', 587))]
+
+        self.sender.send_bulk_emails([Recipient.create('a@example.com')], 'Subject', 'Body')
+        self.sender.send_bulk_emails([Recipient.create('b@example.com')], 'Subject', 'Body')
+
+        self.assertEqual(mock_getaddrinfo.call_count, 2)
+        mock_smtp.return_value.connect.assert_called_with('203.0.113.5', 587)
+
+    @patch('Sending_mail.PinnedSMTP')
+    def test_connect_smtp_tries_next_address(self, mock_smtp):
+        """Test that an unreachable address falls through to the next resolved one."""
+        self.sender._resolved_addrs = ['192.0.2.10', '192.0.2.11']
+        connection = mock_smtp.return_value
+        connection.connect.side_effect = [ConnectionRefusedError(), (220, b'ready')]
+
+        self.assertTrue(self.sender.connect_smtp())
+        connection.connect.assert_called_with('192.0.2.11', 587)
+        self.assertEqual(self.sender._resolved_addrs, ['192.0.2.11', '192.0.2.10'])
+
+    @patch('Sending_mail.PinnedSMTP')
+    def test_connect_smtp_failure_clears_pinned_address(self, mock_smtp):
+        """Test that a failed connect retries the hostname and forces a fresh DNS lookup."""
+        mock_smtp.return_value.connect.side_effect = ConnectionRefusedError()
+
+        self.assertFalse(self.sender.connect_smtp())
+        mock_smtp.return_value.connect.assert_called_with(self.config.smtp_server, 587)
+        self.assertEqual(self.sender._resolved_addrs, [])
+
+    @patch('Sending_mail.PinnedSMTP')
     def test_connect_smtp_auth_failure(self, mock_smtp):
         """Test SMTP authentication failure."""
         mock_instance = Mock()
@@ -191,6 +454,377 @@ class TestEmailSender(unittest.TestCase):
         
         self.assertFalse(result)
 
+    @patch('Sending_mail.PinnedSMTP')
+    def test_send_bulk_emails_uses_pool(self, mock_smtp):
+        """Test bulk sending across pooled connections."""
+        self.config.smtp_pool_size = 2
+        self.config.batch_rcpts = 1
+        self.sender.bucket = TokenBucket(rate=0)
+        email_list = [
+            Recipient.create(f'user{i}@example.com', f'User {i}') for i in range(4)
+        ]
+
+        results = self.sender.send_bulk_emails(email_list, 'Subject', 'Body')
+
+        self.assertEqual(results['sent'], 4)
+        self.assertEqual(results['failed'], 0)
+        self.assertLessEqual(mock_smtp.call_count, 2)
+        self.assertEqual(mock_smtp.return_value.sendmail.call_count, 4)
+
+    @patch('Sending_mail.PinnedSMTP')
+    def test_send_bulk_emails_serializes_static_message_once(self, mock_smtp):
+        """Test that an unpersonalized message is flattened once and only the To: address varies."""
+        self.config.batch_rcpts = 1
+        self.sender.bucket = TokenBucket(rate=0)
+        email_list = [Recipient.create('a@example.com'), Recipient.create('b@example.com')]
+
+        self.sender.send_bulk_emails(email_list, 'Subject', 'Body')
+
+        sent = {c.args[1][0]: c.args[2] for c in mock_smtp.return_value.sendmail.call_args_list}
+        self.assertIn(b'To: a@example.com', sent['a@example.com'])
+        self.assertIn(b'To: b@example.com', sent['b@example.com'])
+        self.assertNotIn(b'__RCPT__', sent['b@example.com'])
+        mock_smtp.return_value.send_message.assert_not_called()
+
+    @patch('Sending_mail.PinnedSMTP')
+    def test_send_bulk_emails_batches_recipients(self, mock_smtp):
+        """Test that unpersonalized messages go to several recipients per transaction."""
+        self.config.batch_rcpts = 2
+        self.sender.bucket = Mock()
+        connection = mock_smtp.return_value
+        connection.sendmail.side_effect = lambda from_addr, to_addrs, msg: (
+            {'bad@example.com': (550, b'No such user')} if 'bad@example.com' in to_addrs else {}
+        )
+        email_list = [Recipient.create(addr) for addr in
+                      ('a@example.com', 'bad@example.com', 'c@example.com')]
+
+        results = self.sender.send_bulk_emails(email_list, 'Subject', 'Body')
+
+        self.assertEqual(results['sent'], 2)
+        self.assertEqual(results['failed'], 1)
+        batches = sorted(c.args[1] for c in connection.sendmail.call_args_list)
+        self.assertEqual(batches, [['a@example.com', 'bad@example.com'], ['c@example.com']])
+        self.assertIn(b'To: undisclosed-recipients:;', connection.sendmail.call_args.args[2])
+        # One token per recipient, not per transaction
+        charged = sorted(c.args[0] for c in self.sender.bucket.acquire.call_args_list)
+        self.assertEqual(charged, [1, 2])
+
+    @patch('Sending_mail.PinnedSMTP')
+    def test_send_bulk_emails_static_non_ascii_subject(self, mock_smtp):
+        """Test that a pre-serialized multipart message RFC 2047-encodes a non-ASCII subject."""
+        self.config.batch_rcpts = 1
+        self.sender.bucket = TokenBucket(rate=0)
+        email_list = [Recipient.create('a@example.com')]
+
+        results = self.sender.send_bulk_emails(email_list, 'Khám phá Việt Nam', 'Xin chào',
+                                               html_body='<p>chào</p>')
+
+        self.assertEqual(results['sent'], 1)
+        raw = mock_smtp.return_value.sendmail.call_args.args[2]
+        self.assertIn(b'Subject: =?utf-8?', raw)
+        self.assertIn(b'To: a@example.com\r\n', raw)
+
+    @patch('Sending_mail.PinnedSMTP')
+    def test_send_bulk_emails_personalized_uses_send_message(self, mock_smtp):
+        """Test that personalized messages are built per recipient."""
+        self.sender.bucket = TokenBucket(rate=0)
+        email_list = [Recipient.create('a@example.com', 'Ann')]
+
+        self.sender.send_bulk_emails(email_list, 'Hi {name}', 'Body')
+
+        message = mock_smtp.return_value.send_message.call_args.args[0]
+        self.assertEqual(message['Subject'], 'Hi Ann')
+
+    @patch('Sending_mail.PinnedSMTP')
+    def test_send_bulk_emails_accepts_iterator(self, mock_smtp):
+        """Test bulk sending from a lazily produced recipient stream."""
+        self.sender.bucket = TokenBucket(rate=0)
+        recipients = (Recipient.create(f'user{i}@example.com') for i in range(3))
+
+        results = self.sender.send_bulk_emails(recipients, 'Subject', 'Body')
+
+        self.assertEqual(results['sent'], 3)
+
+    def test_send_bulk_emails_empty_iterator(self):
+        """Test that an empty recipient stream sends nothing."""
+        results = self.sender.send_bulk_emails(iter([]), 'Subject', 'Body')
+        self.assertEqual(results, {'sent': 0, 'failed': 0, 'skipped': 0})
+
+    def test_send_bulk_emails_setup_error_opens_no_connections(self):
+        """Test that a failure while preparing the batch happens before any connection is opened."""
+        with patch.object(self.sender, '_open_smtp_connection') as mock_open, \
+                patch.object(self.sender, '_build_attachment_parts', side_effect=OSError("unreadable")):
+            with self.assertRaises(OSError):
+                self.sender.send_bulk_emails([Recipient.create('a@example.com')], 'Subject', 'Body',
+                                             attachments=['missing.pdf'])
+        mock_open.assert_not_called()
+
+    def test_send_bulk_emails_with_connection_limit(self):
+        """Test that every email is sent when the server allows only one connection."""
+        self.config.smtp_pool_size = 5
+        self.config.batch_rcpts = 1
+        self.sender.bucket = TokenBucket(rate=0)
+        conn = Mock()
+        conn.sendmail.side_effect = lambda *args, **kwargs: time.sleep(0.001) or {}
+        refused = smtplib.SMTPConnectError(421, b'Too many connections')
+        with patch.object(self.sender, '_open_smtp_connection', side_effect=[conn] + [refused] * 10):
+            recipients = [Recipient.create(f'user{i}@example.com', f'User {i}') for i in range(20)]
+            results = self.sender.send_bulk_emails(recipients, 'Subject', 'Body')
+
+        self.assertEqual(results['sent'], 20)
+        self.assertEqual(results['failed'], 0)
+
+    def test_update_progress_throttles_postfix(self):
+        """Test that the postfix is only rebuilt every 64 recipients."""
+        progress_bar = Mock(total=130, n=0)
+        results = {'sent': 0, 'failed': 0}
+        for _ in range(130):
+            results['sent'] += 1
+            progress_bar.n += 1
+            EmailSender._update_progress(progress_bar, results)
+
+        self.assertEqual(progress_bar.update.call_count, 130)
+        self.assertEqual(progress_bar.set_postfix_str.call_count, 2)
+        progress_bar.set_postfix.assert_not_called()
+
+    def test_finish_progress_ends_at_sent_count(self):
+        """Test that a bar sized from an upper-bound total finishes at what was processed."""
+        progress_bar = Mock(total=10, n=7)
+
+        EmailSender._finish_progress(progress_bar, {'sent': 6, 'failed': 1})
+
+        self.assertEqual(progress_bar.total, 7)
+
+    @patch('Sending_mail.PinnedSMTP')
+    def test_send_bulk_emails_shows_final_counts(self, mock_smtp):
+        """Test that a short run without a known total still ends with the sent/failed postfix."""
+        self.config.batch_rcpts = 1
+        self.sender.bucket = TokenBucket(rate=0)
+        progress_bar = MagicMock(total=None, n=0)
+        progress_bar.__enter__.return_value = progress_bar
+        recipients = (Recipient.create(f'user{i}@example.com') for i in range(2))
+
+        with patch.object(EmailSender, '_progress_bar', return_value=progress_bar):
+            self.sender.send_bulk_emails(recipients, 'Subject', 'Body')
+
+        progress_bar.set_postfix_str.assert_called_with("Sent=2, Failed=0", refresh=False)
+        progress_bar.refresh.assert_called_once()
+
+
+class TestSMTPConnectionPool(unittest.TestCase):
+    """Test SMTPConnectionPool class."""
+
+    def test_send_message_reconnects_on_disconnect(self):
+        """Test that a dropped connection is replaced and the send retried."""
+        stale, fresh = Mock(), Mock()
+        stale.send_message.side_effect = smtplib.SMTPServerDisconnected("gone")
+        factory = Mock(side_effect=[stale, fresh])
+        pool = SMTPConnectionPool(factory, size=1)
+
+        pool.send_message(Mock())
+
+        fresh.send_message.assert_called_once()
+        stale.quit.assert_called_once()
+
+    def test_send_message_recycles_after_cap(self):
+        """Test that a connection is recycled after max_msgs_per_conn messages."""
+        factory = Mock(side_effect=lambda: Mock())
+        pool = SMTPConnectionPool(factory, size=1, max_msgs_per_conn=2)
+
+        for _ in range(3):
+            pool.send_message(Mock())
+
+        self.assertEqual(factory.call_count, 2)
+
+    def test_send_message_skips_other_stale_connections(self):
+        """Test that the retry uses the replacement, not another dropped idle connection."""
+        stale = [Mock(), Mock()]
+        fresh = Mock()
+        for conn in stale:
+            conn.send_message.side_effect = smtplib.SMTPServerDisconnected("idle timeout")
+        factory = Mock(side_effect=stale + [fresh])
+        pool = SMTPConnectionPool(factory, size=2)
+        with pool.acquire():
+            with pool.acquire():
+                pass
+
+        pool.send_message(Mock())
+
+        fresh.send_message.assert_called_once()
+        self.assertEqual(sum(conn.send_message.call_count for conn in stale), 1)
+
+    def test_replace_keeps_connection_count(self):
+        """Test that replacing a connection never lets the pool look below its size."""
+        stale, fresh = Mock(), Mock()
+        factory = Mock(side_effect=[stale, fresh])
+        pool = SMTPConnectionPool(factory, size=1, max_msgs_per_conn=1)
+        counts = []
+        stale.quit.side_effect = lambda: counts.append(pool._created)
+
+        pool.send_message(Mock())
+        pool.send_message(Mock())
+
+        fresh.send_message.assert_called_once()
+        self.assertEqual(counts, [1])
+        self.assertEqual(pool._created, 1)
+
+    def test_pool_grows_up_to_size(self):
+        """Test that connections are opened lazily and never exceed the pool size."""
+        factory = Mock(side_effect=lambda: Mock())
+        pool = SMTPConnectionPool(factory, size=2)
+        self.assertEqual(factory.call_count, 1)
+
+        with pool.acquire():
+            with pool.acquire():
+                pass
+        self.assertEqual(factory.call_count, 2)
+
+        pool.close_all()
+        self.assertEqual(pool._created, 0)
+
+    def test_pool_stops_growing_when_server_refuses_connections(self):
+        """Test that a refused extra connection falls back to the connections already open."""
+        conn = Mock()
+        factory = Mock(side_effect=[conn, smtplib.SMTPConnectError(421, b'Too many connections')])
+        pool = SMTPConnectionPool(factory, size=5)
+
+        def use_second_connection():
+            with pool.acquire() as second:
+                self.assertIs(second, conn)
+
+        with pool.acquire():
+            worker = threading.Thread(target=use_second_connection)
+            worker.start()
+            worker.join(timeout=0.1)
+            self.assertEqual(pool.size, 1)
+        worker.join(timeout=1)
+        self.assertFalse(worker.is_alive())
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Test TokenBucket rate limiter."""
+
+    @patch('Sending_mail.time.sleep')
+    def test_burst_does_not_sleep(self, mock_sleep):
+        """Test that a full bucket releases a burst without blocking."""
+        bucket = TokenBucket(rate=1.0, capacity=3)
+        for _ in range(3):
+            bucket.acquire()
+        mock_sleep.assert_not_called()
+
+    @patch('Sending_mail.time.sleep')
+    def test_empty_bucket_sleeps(self, mock_sleep):
+        """Test that an empty bucket blocks until a token is refilled."""
+        bucket = TokenBucket(rate=2.0, capacity=1)
+        bucket.acquire()
+        bucket.acquire()
+        mock_sleep.assert_called_once()
+        self.assertLessEqual(mock_sleep.call_args[0][0], 0.5)
+
+    @patch('Sending_mail.time.sleep')
+    def test_acquire_count_charges_every_token(self, mock_sleep):
+        """Test that taking several tokens at once waits for all of them."""
+        bucket = TokenBucket(rate=10.0, capacity=1)
+        bucket.acquire(5)
+        mock_sleep.assert_called_once()
+        self.assertAlmostEqual(mock_sleep.call_args[0][0], 0.4, places=2)
+
+    @patch('Sending_mail.time.sleep')
+    def test_zero_rate_is_unlimited(self, mock_sleep):
+        """Test that a non-positive rate disables pacing."""
+        bucket = TokenBucket(rate=0, capacity=1)
+        for _ in range(5):
+            bucket.acquire()
+        mock_sleep.assert_not_called()
+
+
+@unittest.skipIf(Sending_mail.aiosmtplib is None, "aiosmtplib not installed")
+class TestAsyncEmailSender(unittest.TestCase):
+    """Test AsyncEmailSender class."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.config = EmailSenderConfig()
+        self.config.email_address = 'test@example.com'
+        self.config.email_password = 'password'
+        self.config.smtp_pool_size = 2
+        self.sender = AsyncEmailSender(self.config)
+        self.sender.bucket = TokenBucket(rate=0)
+
+    @patch('Sending_mail.aiosmtplib.SMTP')
+    def test_send_bulk_emails(self, mock_smtp):
+        """Test concurrent sending over asynchronous SMTP sessions."""
+        client = AsyncMock()
+        mock_smtp.return_value = client
+        email_list = [Recipient.create(f'user{i}@example.com', f'User {i}') for i in range(5)]
+
+        results = self.sender.send_bulk_emails(email_list, 'Hi {name}', 'Body')
+
+        self.assertEqual(results['sent'], 5)
+        self.assertEqual(mock_smtp.call_count, 2)
+        self.assertEqual(client.send_message.await_count, 5)
+        client.login.assert_awaited_with('test@example.com', 'password')
+        self.assertEqual(client.quit.await_count, 2)
+
+    @patch('Sending_mail.aiosmtplib.SMTP')
+    def test_send_bulk_emails_connection_failure(self, mock_smtp):
+        """Test that a failed connection aborts the batch without sending."""
+        client = AsyncMock()
+        client.login.side_effect = Exception("Auth failed")
+        mock_smtp.return_value = client
+
+        results = self.sender.send_bulk_emails([Recipient.create('a@example.com')], 'S', 'B')
+
+        self.assertEqual(results['sent'], 0)
+        client.send_message.assert_not_awaited()
+
+    @patch('Sending_mail.aiosmtplib.SMTP')
+    def test_send_bulk_emails_partial_connection_failure(self, mock_smtp):
+        """Test that sending continues on the sessions that did connect."""
+        client, refused = AsyncMock(), AsyncMock()
+        refused.connect.side_effect = Sending_mail.aiosmtplib.SMTPConnectError("Too many connections")
+        mock_smtp.side_effect = [client, refused]
+        email_list = [Recipient.create(f'user{i}@example.com') for i in range(4)]
+
+        results = self.sender.send_bulk_emails(email_list, 'S', 'B')
+
+        self.assertEqual(results['sent'], 4)
+        self.assertEqual(client.send_message.await_count, 4)
+
+    @patch('Sending_mail.aiosmtplib.SMTP')
+    def test_send_bulk_emails_recipient_refused(self, mock_smtp):
+        """Test that aiosmtplib recipient errors are reported as refusals."""
+        client = AsyncMock()
+        client.send_message.side_effect = Sending_mail.aiosmtplib.SMTPRecipientsRefused([])
+        mock_smtp.return_value = client
+
+        with self.assertLogs('EmailSender', level='ERROR') as logs:
+            results = self.sender.send_bulk_emails([Recipient.create('a@example.com')], 'S', 'B')
+
+        self.assertEqual(results['failed'], 1)
+        self.assertTrue(any('Recipient refused a@example.com' in line for line in logs.output))
+
+
+class TestCountRows(unittest.TestCase):
+    """Test CSV row counting used for progress totals."""
+
+    def _write(self, content):
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
+            f.write(content)
+        self.addCleanup(os.unlink, f.name)
+        return f.name
+
+    def test_count_lines_without_trailing_newline(self):
+        """Test that a final line without a newline is counted."""
+        self.assertEqual(count_lines(self._write('a\nb\nc')), 3)
+        self.assertEqual(count_lines(self._write('a\nb\n')), 2)
+        self.assertEqual(count_lines(self._write('')), 0)
+
+    def test_count_csv_rows_skips_header(self):
+        """Test that the header row is not counted as a recipient."""
+        self.assertEqual(count_csv_rows(self._write('email,name\na@example.com,A\n')), 1)
+        self.assertEqual(count_csv_rows(self._write('a@example.com,A\nb@example.com,B\n')), 2)
+
 
 class TestLoadTemplate(unittest.TestCase):
     """Test template loading function."""